@@ -1,18 +1,31 @@
 from __future__ import annotations
 
 import argparse
-import logging
+import collections
+import concurrent.futures
+import functools
+import io
+import itertools
+import logging.handlers
+import os
+import queue
 import signal
 import sys
 from typing import IO
+from typing import Iterator
 from typing import Sequence
 
 from autoflake8 import __version__
+from autoflake8.fix import compile_exclude
 from autoflake8.fix import find_files
 from autoflake8.fix import fix_file
 from autoflake8.fix import fix_stdin
 
 
+# Below this many files, the default is to fix them in this process.
+_DEFAULT_JOBS_MIN_FILES = 32
+
+
 def _main(
     argv: Sequence[str],
     stdout: IO[bytes],
@@ -25,6 +38,72 @@ def _main(
     0 means no error.
     """
 
+    args = _build_parser().parse_args(argv[1:])
+    set_logging_level(logger, args.verbosity)
+
+    filenames: Iterator[str] = find_files(
+        list(dict.fromkeys(args.files)),
+        args.recursive,
+        compile_exclude(args.exclude),
+        logger=logger,
+    )
+
+    if args.jobs is None:
+        # Starting the pool costs more than fixing a handful of files, so
+        # only do it by default when there are enough of them.
+        jobs = min(32, os.cpu_count() or 1)
+        min_files = _DEFAULT_JOBS_MIN_FILES
+    else:
+        jobs = args.jobs
+        min_files = 2
+
+    if jobs > 1:
+        # Look ahead just enough to size the pool, and to skip it entirely
+        # when there are too few files to fix.
+        head = list(itertools.islice(filenames, max(jobs, min_files)))
+        filenames = itertools.chain(head, filenames)
+        if len(head) >= min_files:
+            return _fix_files_in_parallel(
+                filenames,
+                min(jobs, len(head)),
+                args,
+                stdout,
+                stdin,
+                logger,
+            )
+
+    exit_status = 0
+    for name in filenames:
+        if name == "-":
+            exit_status |= fix_stdin(
+                stdin=stdin,
+                stdout=stdout,
+                args=args,
+                logger=logger,
+            )
+        else:
+            exit_status |= _fix_file(name, args, stdout, logger)
+
+    return exit_status
+
+
+def _fix_file(
+    filename: str,
+    args: argparse.Namespace,
+    stdout: IO[bytes],
+    logger: logging.Logger,
+) -> int:
+    """Run fix_file(), turning I/O errors into a logged error and status 3."""
+    try:
+        return fix_file(filename=filename, args=args, stdout=stdout, logger=logger)
+    except OSError as exception:
+        logger.error(str(exception))
+        return 3
+
+
+@functools.lru_cache(maxsize=1)
+def _build_parser() -> argparse.ArgumentParser:
+    """Return the argument parser, built only once per process."""
     parser = argparse.ArgumentParser(description=__doc__, prog="autoflake8")
     parser.add_argument(
         "-c",
@@ -42,7 +121,7 @@ def _main(
         "--exclude",
         metavar="globs",
         type=_split_comma_separated,
-        default=set(),
+        default=frozenset(),
         help="exclude file/directory names that match these comma-separated globs",
     )
     parser.add_argument(
@@ -87,6 +166,15 @@ def _main(
         default=0,
         help="print more verbose logs (you can " "repeat `-v` to make it more verbose)",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help=(
+            "number of files to fix in parallel (default: the number of CPUs, "
+            f"when there are at least {_DEFAULT_JOBS_MIN_FILES} files to fix)"
+        ),
+    )
     parser.add_argument("--exit-zero-even-if-changed", action="store_true")
     parser.add_argument("files", nargs="+", help="files to format")
 
@@ -108,40 +196,123 @@ def _main(
         ),
     )
 
-    args = parser.parse_args(argv[1:])
-    set_logging_level(logger, args.verbosity)
+    return parser
 
+
+def _fix_files_in_parallel(
+    filenames: Iterator[str],
+    jobs: int,
+    args: argparse.Namespace,
+    stdout: IO[bytes],
+    stdin: IO[bytes],
+    logger: logging.Logger,
+) -> int:
+    """
+    Fix files using a pool of worker processes.
+
+    Files are submitted a window at a time, largest first within each window,
+    so that big files don't end up running alone at the end. The next window
+    is found and submitted before the current one is reported, which keeps
+    the workers busy while this process walks directories. Output and logs
+    are still replayed in the same order as the sequential loop in _main
+    would have produced them. stdin is always handled in this process.
+    """
     exit_status = 0
+    window = 4 * jobs
+    pending: collections.deque[concurrent.futures.Future | None]
+    pending = collections.deque()
 
-    filenames = list(set(args.files))
-    for name in find_files(
-        filenames,
-        args.recursive,
-        args.exclude,
-        logger=logger,
-    ):
-        if name == "-":
+    def report(future: concurrent.futures.Future | None) -> None:
+        nonlocal exit_status
+
+        if future is None:
             exit_status |= fix_stdin(
                 stdin=stdin,
                 stdout=stdout,
                 args=args,
                 logger=logger,
             )
-        else:
-            try:
-                exit_status |= fix_file(
-                    filename=name,
-                    args=args,
-                    stdout=stdout,
-                    logger=logger,
+            return
+
+        status, output, records = future.result()
+        for record in records:
+            logger.handle(record)
+        stdout.write(output)
+        exit_status |= status
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(logger.getEffectiveLevel(),),
+    ) as executor:
+        while True:
+            names = list(itertools.islice(filenames, window))
+            if not names:
+                break
+
+            futures = {
+                name: executor.submit(_fix_file_in_worker, name, args)
+                for name in sorted(
+                    (name for name in names if name != "-"),
+                    key=_file_size,
+                    reverse=True,
                 )
-            except OSError as exception:
-                logger.error(str(exception))
-                exit_status = 3
+            }
+            pending.extend(futures.get(name) for name in names)
+
+            while len(pending) > window:
+                report(pending.popleft())
+
+        while pending:
+            report(pending.popleft())
 
     return exit_status
 
 
+def _file_size(filename: str) -> int:
+    try:
+        return os.path.getsize(filename)
+    except OSError:
+        # The worker reports the error when it tries to read the file.
+        return 0
+
+
+_WORKER_LOGGER_NAME = "autoflake8.worker"
+_worker_log_records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+
+
+def _init_worker(log_level: int) -> None:
+    logger = logging.getLogger(_WORKER_LOGGER_NAME)
+    logger.propagate = False
+    logger.handlers = [logging.handlers.QueueHandler(_worker_log_records)]
+    logger.setLevel(log_level)
+
+
+def _fix_file_in_worker(
+    filename: str,
+    args: argparse.Namespace,
+) -> tuple[int, bytes, list[logging.LogRecord]]:
+    """
+    Run fix_file() in a worker process.
+
+    Returns the exit status, whatever would have been written to stdout and
+    the log records emitted.
+    """
+    stdout = io.BytesIO()
+    status = _fix_file(
+        filename,
+        args,
+        stdout,
+        logging.getLogger(_WORKER_LOGGER_NAME),
+    )
+
+    records = []
+    while not _worker_log_records.empty():
+        records.append(_worker_log_records.get_nowait())
+
+    return status, stdout.getvalue(), records
+
+
 def make_logger(stderr: IO[str]) -> logging.Logger:
     logger = logging.getLogger("autoflake8")
     logger.propagate = False
@@ -4,6 +4,7 @@ import argparse
 import ast
 import collections
 import difflib
+import errno
 import fnmatch
 import io
 import logging
@@ -11,15 +12,16 @@ import os
 import re
 import tempfile
 import tokenize
+from typing import AnyStr
 from typing import IO
 from typing import Iterable
 from typing import Iterator
 from typing import Mapping
+from typing import NamedTuple
 from typing import Sequence
 
-import pyflakes.api
+import pyflakes.checker
 import pyflakes.messages
-import pyflakes.reporter
 
 from autoflake8.multiline import _filter_imports
 from autoflake8.multiline import FilterMultilineImport
@@ -28,20 +30,39 @@ from autoflake8.pending_fix import PendingFix
 
 
 ATOMS = frozenset([tokenize.NAME, tokenize.NUMBER, tokenize.STRING])
+CLOSING_BRACKETS = {b")": b"(", b"]": b"[", b"}": b"{"}
 
 
 class Regex:
+    AS_CLAUSE = re.compile(rb" as \w+:$")
+    BARE_NAME = re.compile(rb"^\w+\s*$")
     BASE_MODULE = re.compile(rb"\bfrom\s+([^ ]+)")
-    DEL = re.compile(rb"\bdel\b")
-    DUNDER_ALL = re.compile(rb"\b__all__\b")
+    BRACKET = re.compile(rb"[()\[\]{}]")
+    COMMA_WS = re.compile(rb"\s*,\s*")
+    DICT_ENTRY = re.compile(rb"\s*(.*)\s*:\s*(.*),\s*$")
+    DUNDER_OR_DEL = re.compile(rb"\b(?:__all__|del)\b")
     EXCEPT = re.compile(rb"^\s*except [\s,()\w]+ as \w+:$")
     INDENTATION = re.compile(rb"^\s*")
+    PARENTHESES = re.compile(rb"[()]")
+    PASS_LINE = re.compile(rb"^\s*pass\s*$", re.M)
     PYTHON_SHEBANG = re.compile(rb"^#!.*\bpython3?\b\s*$")
+    QUOTE = re.compile(rb"['\"]")
     STAR = re.compile(rb"\*")
+    STATEMENT_SEPARATOR = re.compile(rb"[\\:;]")
     IMPORT = re.compile(rb"\bimport\b\s*")
+    IMPORT_SPLIT = re.compile(rb"\bimport\b")
     CODING = re.compile(rb"^[ \t\f]*#.*?coding[:=][ \t]*([-_.a-zA-Z0-9]+)")
 
 
+class LineFix:
+    """Bit flags for the fixes filter_code applies to a line."""
+
+    UNUSED_IMPORT = 1
+    UNUSED_VARIABLE = 2
+    DUPLICATE_KEY = 4
+    STAR_IMPORT = 8
+
+
 def detect_source_encoding(source: bytes) -> str:
     """
     Detects the encoding of a byte stream representing a Python source file
@@ -53,8 +74,11 @@ def detect_source_encoding(source: bytes) -> str:
     - if no encoding defined, assume it is utf-8
     """
 
-    lines = source.splitlines()[:2]
-    for line in lines:
+    # Only split what's needed to find the first two lines, rather than the
+    # whole source.
+    end = source.find(b"\n", source.find(b"\n") + 1)
+    head = source if end == -1 else source[:end]
+    for line in head.splitlines()[:2]:
         m = Regex.CODING.match(line)
         if m is not None:
             return m.group(1).decode()
@@ -75,13 +99,9 @@ def unused_import_module_name(
     messages: Iterable[pyflakes.messages.Message],
 ) -> Iterator[tuple[int, bytes]]:
     """Yield line number and module name of unused imports."""
-    regex = re.compile("'(.+?)'")
     for message in messages:
         if isinstance(message, pyflakes.messages.UnusedImport):
-            module_name = regex.search(str(message))
-            if module_name:
-                module_name = module_name.group()[1:-1]
-                yield (message.lineno, module_name.encode())
+            yield (message.lineno, message.message_args[0].encode())
 
 
 def star_import_used_line_numbers(
@@ -150,69 +170,138 @@ def create_key_to_messages_dict(
     messages: Iterable[pyflakes.messages.MultiValueRepeatedKeyLiteral],
 ) -> Mapping[str, list[pyflakes.messages.MultiValueRepeatedKeyLiteral]]:
     """Return dict mapping the key to list of messages."""
-    dictionary = collections.defaultdict(lambda: [])
+    dictionary = collections.defaultdict(list)
     for message in messages:
         dictionary[message.message_args[0]].append(message)
     return dictionary
 
 
-def check(source: bytes) -> Iterable[pyflakes.messages.Message]:
-    """Return messages from pyflakes."""
-    reporter = ListReporter()
-    try:
-        pyflakes.api.check(source, filename="<string>", reporter=reporter)
-    except (AttributeError, RecursionError, UnicodeDecodeError):
-        pass
-    return reporter.messages
-
+class ClassifiedMessages(NamedTuple):
+    """pyflakes messages grouped by the fixes that use them."""
 
-class StubFile:
-    """Stub out file for pyflakes."""
+    unused_import_line_numbers: frozenset[int]
+    unused_module_names: Mapping[int, list[bytes]]
+    star_import_used_line_numbers: frozenset[int]
+    star_import_undefined_names: list[bytes]
+    unused_variable_line_numbers: frozenset[int]
+    duplicate_key_messages: list[pyflakes.messages.MultiValueRepeatedKeyLiteral]
 
-    def write(self, *_):
-        """Stub out."""
 
+def classify_messages(
+    messages: Iterable[pyflakes.messages.Message],
+) -> ClassifiedMessages:
+    """Group messages by kind in a single pass."""
+    unused_imports: list[pyflakes.messages.Message] = []
+    star_imports: list[pyflakes.messages.Message] = []
+    star_import_usages: list[pyflakes.messages.Message] = []
+    unused_variables: list[pyflakes.messages.Message] = []
+    duplicate_keys: list[pyflakes.messages.Message] = []
+
+    # Dispatch on the exact message type: a single dict lookup per message
+    # instead of a chain of isinstance checks.
+    buckets = {
+        pyflakes.messages.UnusedImport: unused_imports,
+        pyflakes.messages.ImportStarUsed: star_imports,
+        pyflakes.messages.ImportStarUsage: star_import_usages,
+        pyflakes.messages.UnusedVariable: unused_variables,
+        pyflakes.messages.MultiValueRepeatedKeyLiteral: duplicate_keys,
+    }
+    for message in messages:
+        bucket = buckets.get(type(message))
+        if bucket is not None:
+            bucket.append(message)
+
+    unused_module_names: dict[int, list[bytes]] = collections.defaultdict(list)
+    for line_number, module_name in unused_import_module_name(unused_imports):
+        unused_module_names[line_number].append(module_name)
+
+    return ClassifiedMessages(
+        unused_import_line_numbers=frozenset(
+            unused_import_line_numbers(unused_imports),
+        ),
+        unused_module_names=unused_module_names,
+        star_import_used_line_numbers=frozenset(
+            star_import_used_line_numbers(star_imports),
+        ),
+        star_import_undefined_names=[
+            undefined_name
+            for _, undefined_name, _ in star_import_usage_undefined_name(
+                star_import_usages,
+            )
+        ],
+        unused_variable_line_numbers=frozenset(
+            unused_variable_line_numbers(unused_variables),
+        ),
+        duplicate_key_messages=duplicate_keys,
+    )
 
-class ListReporter(pyflakes.reporter.Reporter):
-    """Accumulate messages in messages list."""
 
-    def __init__(self) -> None:
-        """Initialize.
+def check(source: bytes) -> Iterable[pyflakes.messages.Message]:
+    """Return messages from pyflakes."""
+    # Same as pyflakes.api.check(): any failure to parse means no messages.
+    try:
+        tree = ast.parse(source, filename="<string>")
+    except Exception:
+        return []
 
-        Ignore errors from Reporter.
-        """
-        ignore = StubFile()
-        super().__init__(ignore, ignore)
-        self.messages: list[pyflakes.messages.Message] = []
+    try:
+        if hasattr(pyflakes.checker, "make_tokens"):
+            # pyflakes < 3.0 needs the tokens to check "# type:" comments.
+            checker = pyflakes.checker.Checker(
+                tree,
+                filename="<string>",
+                file_tokens=pyflakes.checker.make_tokens(source),
+            )
+        else:
+            checker = pyflakes.checker.Checker(tree, filename="<string>")
+    except (AttributeError, RecursionError, UnicodeDecodeError):
+        return []
 
-    def flake(self, message: pyflakes.messages.Message) -> None:
-        """Accumulate messages."""
-        self.messages.append(message)
+    checker.messages.sort(key=lambda message: message.lineno)
+    return checker.messages
 
 
 def is_multiline_import(line: bytes, previous_line: bytes = b"") -> bool:
     """Return True if import is spans multiples lines."""
-    for symbol in b"()":
-        if symbol in line:
-            return True
+    if Regex.PARENTHESES.search(line):
+        return True
 
     return is_multiline_statement(line, previous_line)
 
 
 def is_multiline_statement(line: bytes, previous_line: bytes = b"") -> bool:
     """Return True if this is part of a multiline statement."""
-    for symbol in b"\\:;":
-        if symbol in line:
-            return True
+    if Regex.STATEMENT_SEPARATOR.search(line):
+        return True
+
+    previous_line_continues = previous_line.rstrip().endswith(b"\\")
 
-    sio = io.StringIO(line.decode())
+    # Without quotes, brackets are the only thing that can leave the line
+    # open, and matching them is much cheaper than tokenizing the line.
+    if not Regex.QUOTE.search(line):
+        code = line.partition(b"#")[0]
+        return previous_line_continues or not _brackets_match(code)
+
+    readline = iter(line.decode().splitlines(keepends=True)).__next__
     try:
-        list(tokenize.generate_tokens(sio.readline))
-        return previous_line.rstrip().endswith(b"\\")
+        list(tokenize.generate_tokens(readline))
+        return previous_line_continues
     except (SyntaxError, tokenize.TokenError):
         return True
 
 
+def _brackets_match(code: bytes) -> bool:
+    """Return True if every bracket in code is closed by a matching one."""
+    open_brackets = []
+    for bracket in Regex.BRACKET.findall(code):
+        if bracket not in CLOSING_BRACKETS:
+            open_brackets.append(bracket)
+        elif not open_brackets or open_brackets.pop() != CLOSING_BRACKETS[bracket]:
+            return False
+
+    return not open_brackets
+
+
 def filter_from_import(line: bytes, unused_module: tuple[bytes, ...]) -> bytes:
     """
     Parse and filter ``from something import a, b, c``.
@@ -220,14 +309,14 @@ def filter_from_import(line: bytes, unused_module: tuple[bytes, ...]) -> bytes:
     Return line without unused import modules, or `pass` if all of the
     module in import is unused.
     """
-    (indentation, imports) = re.split(pattern=rb"\bimport\b", string=line, maxsplit=1)
+    (indentation, imports) = Regex.IMPORT_SPLIT.split(line, maxsplit=1)
     base_module_match = Regex.BASE_MODULE.search(indentation)
     if base_module_match:
         base_module = base_module_match.group(1)
     else:
         base_module = None
 
-    imports = re.split(pattern=rb"\s*,\s*", string=imports.strip())
+    imports = Regex.COMMA_WS.split(imports.strip())
     filtered_imports = _filter_imports(imports, base_module, unused_module)
 
     # All of the import in this statement is unused
@@ -252,7 +341,7 @@ def break_up_import(line: bytes) -> bytes:
     if not newline:
         return line
 
-    (indentation, imports) = re.split(pattern=rb"\bimport\b", string=line, maxsplit=1)
+    (indentation, imports) = Regex.IMPORT_SPLIT.split(line, maxsplit=1)
 
     indentation += b"import "
     assert newline
@@ -269,72 +358,82 @@ def filter_code(
     remove_unused_variables: bool = False,
 ) -> Iterator[bytes]:
     """Yield code with unused imports removed."""
-    messages = check(source)
+    # Without imports, only unused variables and duplicate keys can be fixed,
+    # so there's no point in running pyflakes unless those were requested.
+    if b"import" not in source and not (
+        remove_unused_variables or remove_duplicate_keys
+    ):
+        yield source
+        return
+
+    messages = classify_messages(check(source))
 
-    marked_import_line_numbers = frozenset(unused_import_line_numbers(messages))
-    marked_unused_module: dict[int, list[bytes]] = collections.defaultdict(lambda: [])
-    for line_number, module_name in unused_import_module_name(messages):
-        marked_unused_module[line_number].append(module_name)
+    marked_import_line_numbers = messages.unused_import_line_numbers
+    marked_unused_module = messages.unused_module_names
 
-    undefined_names = []
+    marked_star_import_line_numbers: frozenset[int] = frozenset()
+    star_replacement = b""
     if expand_star_imports and not (
         # See explanations in #18.
-        Regex.DUNDER_ALL.search(source)
-        or Regex.DEL.search(source)
+        Regex.DUNDER_OR_DEL.search(source)
     ):
-        marked_star_import_line_numbers = frozenset(
-            star_import_used_line_numbers(messages),
-        )
-        if len(marked_star_import_line_numbers) > 1:
-            # Auto expanding only possible for single star import
-            marked_star_import_line_numbers = frozenset()
-        else:
-            for _, undefined_name, _ in star_import_usage_undefined_name(
-                messages,
-            ):
-                undefined_names.append(undefined_name)
-            if not undefined_names:
-                marked_star_import_line_numbers = frozenset()
-    else:
-        marked_star_import_line_numbers = frozenset()
+        star_import_line_numbers = messages.star_import_used_line_numbers
+        undefined_names = messages.star_import_undefined_names
+        # Auto expanding only possible for single star import
+        if len(star_import_line_numbers) == 1 and undefined_names:
+            marked_star_import_line_numbers = star_import_line_numbers
+            star_replacement = b", ".join(sorted(set(undefined_names)))
 
     if remove_unused_variables:
-        marked_variable_line_numbers = frozenset(unused_variable_line_numbers(messages))
+        marked_variable_line_numbers = messages.unused_variable_line_numbers
     else:
         marked_variable_line_numbers = frozenset()
 
     if remove_duplicate_keys:
         marked_key_line_numbers = frozenset(
-            duplicate_key_line_numbers(messages, source),
+            duplicate_key_line_numbers(messages.duplicate_key_messages, source),
         )
     else:
         marked_key_line_numbers = frozenset()
+    first_key_line = min(marked_key_line_numbers, default=-1)
+
+    # Collapse all marked lines into a single lookup table, so lines that don't
+    # need fixing cost one dict lookup.
+    line_fixes: dict[int, int] = {}
+    for flag, line_numbers in (
+        (LineFix.UNUSED_IMPORT, marked_import_line_numbers),
+        (LineFix.UNUSED_VARIABLE, marked_variable_line_numbers),
+        (LineFix.DUPLICATE_KEY, marked_key_line_numbers),
+        (LineFix.STAR_IMPORT, marked_star_import_line_numbers),
+    ):
+        for line_number in line_numbers:
+            line_fixes[line_number] = line_fixes.get(line_number, 0) | flag
+
+    if not line_fixes:
+        # Nothing to rewrite, no need to walk the source line by line.
+        yield source
+        return
 
     previous_line = b""
     result = None
     for line_number, line in enumerate(source.splitlines(keepends=True), start=1):
+        line_fix = line_fixes.get(line_number, 0)
         if isinstance(result, PendingFix):
             result = result(line)
-        elif b"#" in line:
+        elif not line_fix or b"#" in line:
             result = line
-        elif line_number in marked_import_line_numbers:
+        elif line_fix & LineFix.UNUSED_IMPORT:
             result = filter_unused_import(
                 line,
                 unused_module=tuple(marked_unused_module[line_number]),
                 previous_line=previous_line,
             )
-        elif line_number in marked_variable_line_numbers:
+        elif line_fix & LineFix.UNUSED_VARIABLE:
             result = filter_unused_variable(line)
-        elif line_number in marked_key_line_numbers:
-            result = filter_duplicate_key(
-                line,
-                line_number,
-                marked_key_line_numbers,
-            )
-        elif line_number in marked_star_import_line_numbers:
-            result = filter_star_import(line, undefined_names)
+        elif line_fix & LineFix.DUPLICATE_KEY:
+            result = filter_duplicate_key(line, line_number, first_key_line)
         else:
-            result = line
+            result = filter_star_import(line, star_replacement)
 
         if isinstance(result, bytes):
             yield result
@@ -352,13 +451,9 @@ def group_messages_by_line(
     return line_messages
 
 
-def filter_star_import(
-    line: bytes,
-    marked_star_import_undefined_name: Iterable[bytes],
-) -> bytes:
-    """Return line with the star import expanded."""
-    undefined_name = sorted(set(marked_star_import_undefined_name))
-    return Regex.STAR.sub(b", ".join(undefined_name), line)
+def filter_star_import(line: bytes, star_replacement: bytes) -> bytes:
+    """Return line with the star import expanded to `star_replacement`."""
+    return Regex.STAR.sub(star_replacement, line)
 
 
 def filter_unused_import(
@@ -367,8 +462,10 @@ def filter_unused_import(
     previous_line: bytes = b"",
 ) -> bytes | PendingFix:
     """Return line if used, otherwise return None."""
+    stripped = line.lstrip()
+
     # Ignore doctests.
-    if line.lstrip().startswith(b">"):
+    if stripped.startswith(b">"):
         return line
 
     if is_multiline_import(line, previous_line):
@@ -379,7 +476,7 @@ def filter_unused_import(
         )
         return filt()
 
-    is_from_import = line.lstrip().startswith(b"from")
+    is_from_import = stripped.startswith(b"from")
 
     if b"," in line and not is_from_import:
         return break_up_import(line)
@@ -397,8 +494,8 @@ def filter_unused_import(
 
 def filter_unused_variable(line: bytes, previous_line: bytes = b"") -> bytes:
     """Return line if used, otherwise return None."""
-    if re.match(Regex.EXCEPT, line):
-        return re.sub(rb" as \w+:$", b":", line, count=1)
+    if Regex.EXCEPT.match(line):
+        return Regex.AS_CLAUSE.sub(b":", line, count=1)
     elif is_multiline_statement(line, previous_line):
         return line
     elif line.count(b"=") == 1:
@@ -421,10 +518,10 @@ def filter_unused_variable(line: bytes, previous_line: bytes = b"") -> bytes:
 def filter_duplicate_key(
     line: bytes,
     line_number: int,
-    marked_line_numbers: Iterable[int],
+    first_key_line: int,
 ) -> bytes:
     """Return '' if first occurrence of the key otherwise return `line`."""
-    if marked_line_numbers and line_number == sorted(marked_line_numbers)[0]:
+    if line_number == first_key_line:
         return b""
 
     return line
@@ -441,7 +538,7 @@ def dict_entry_has_key(line: bytes, key: str) -> bool:
     if b"#" in line:
         return False
 
-    result = re.match(rb"\s*(.*)\s*:\s*(.*),\s*$", line)
+    result = Regex.DICT_ENTRY.match(line)
     if not result:
         return False
 
@@ -469,7 +566,7 @@ def is_literal_or_name(value: bytes) -> bool:
 
     # Support removal of variables on the right side. But make sure
     # there are no dots, which could mean an access of a property.
-    return re.match(rb"^\w+\s*$", value) is not None
+    return Regex.BARE_NAME.match(value) is not None
 
 
 def useless_pass_line_numbers(
@@ -477,39 +574,50 @@ def useless_pass_line_numbers(
     keep_pass_after_docstring: bool = False,
 ) -> Iterator[int]:
     """Yield line numbers of unneeded "pass" statements."""
-    sio = io.StringIO(source.decode(encoding=detect_source_encoding(source)))
+    # Tokenizing is by far the most expensive part of this function, and it's
+    # only needed when there's at least one line containing just "pass".
+    if not Regex.PASS_LINE.search(source):
+        return
+
     previous_token_type = None
     last_pass_row = None
     last_pass_indentation = None
-    previous_line = b""
-    for token in tokenize.generate_tokens(sio.readline):
-        token_type = token[0]
-        start_row = token[2][0]
-        line = token[4].encode()
-
-        is_pass = token_type == tokenize.NAME and line.strip() == b"pass"
+    previous_line = ""
+    # Tokens are kept as text: encoding each token's line is only needed in
+    # the rare branches that deal with "pass" statements.
+    # tokenize() decodes the source one line at a time, following PEP 263, so
+    # the whole file is never copied into a str.
+    for token_type, string, (start_row, _), _, line in tokenize.tokenize(
+        io.BytesIO(source).readline,
+    ):
+        is_pass = (
+            token_type == tokenize.NAME
+            and string == "pass"
+            and line.encode().strip() == b"pass"
+        )
 
         # Leading "pass".
         if (
             start_row - 1 == last_pass_row
-            and get_indentation(line) == last_pass_indentation
             and token_type in ATOMS
             and not is_pass
+            and get_indentation(line) == last_pass_indentation
         ):
             yield start_row - 1
 
         if is_pass:
             last_pass_row = start_row
             last_pass_indentation = get_indentation(line)
+            previous_line_end = previous_line.encode().rstrip()
 
             is_trailing_pass = (
                 previous_token_type != tokenize.INDENT
-                and not previous_line.rstrip().endswith(b"\\")
+                and not previous_line_end.endswith(b"\\")
             )
 
             is_pass_after_docstring = (
                 previous_token_type == tokenize.NEWLINE
-                and previous_line.rstrip().endswith(b'"""')
+                and previous_line_end.endswith(b'"""')
             )
 
             # Trailing "pass".
@@ -542,18 +650,22 @@ def filter_useless_pass(
         except (SyntaxError, tokenize.TokenError):
             marked_lines = frozenset()
 
+    if not marked_lines:
+        yield source
+        return
+
     for line_number, line in enumerate(source.splitlines(keepends=True), start=1):
         if line_number not in marked_lines:
             yield line
 
 
-def get_indentation(line: bytes) -> bytes:
+def get_indentation(line: AnyStr) -> AnyStr:
     """Return leading whitespace."""
-    if line.strip():
-        non_whitespace_index = len(line) - len(line.lstrip())
-        return line[:non_whitespace_index]
+    stripped = line.lstrip()
+    if stripped:
+        return line[: len(line) - len(stripped)]
     else:
-        return b""
+        return line[:0]
 
 
 def fix_code(
@@ -573,22 +685,34 @@ def fix_code(
         remove_unused_variables = False
 
     filtered_source = None
+    code_is_clean = False
     while True:
+        # Removing useless "pass" statements never introduces new pyflakes
+        # warnings, so once filter_code stops changing the source there's no
+        # need to run pyflakes again.
+        if code_is_clean:
+            code_source = source
+        else:
+            code_source = b"".join(
+                filter_code(
+                    source,
+                    expand_star_imports=expand_star_imports,
+                    remove_duplicate_keys=remove_duplicate_keys,
+                    remove_unused_variables=remove_unused_variables,
+                ),
+            )
+            code_is_clean = code_source == source
+
         filtered_source = b"".join(
             filter_useless_pass(
-                b"".join(
-                    filter_code(
-                        source,
-                        expand_star_imports=expand_star_imports,
-                        remove_duplicate_keys=remove_duplicate_keys,
-                        remove_unused_variables=remove_unused_variables,
-                    ),
-                ),
+                code_source,
                 keep_pass_statements=keep_pass_statements,
                 keep_pass_after_docstring=keep_pass_after_docstring,
             ),
         )
 
+        # Filters with nothing to do yield their input unchanged in a single
+        # chunk, so a clean source comes out equal after one pass.
         if filtered_source == source:
             break
         source = filtered_source
@@ -604,7 +728,9 @@ def fix_file(
     logger: logging.Logger,
 ) -> int:
     """Run fix_code() on a file."""
-    with open(filename, "rb+") as input_file:
+    # The whole file is read at once, so skip the BufferedReader: the raw
+    # FileIO sizes its read from fstat() and needs no intermediate buffer.
+    with open(filename, "rb", buffering=0) as input_file:
         return _fix_file(
             input_file,
             filename,
@@ -655,6 +781,15 @@ def _fix_file(
         if write_to_stdout:
             stdout.write(filtered_source)
         elif args.in_place:
+            # Replacing the file would get around its permissions, so refuse
+            # to fix it when it couldn't have been opened for writing.
+            if not os.access(filename, os.W_OK):
+                raise PermissionError(
+                    errno.EACCES,
+                    os.strerror(errno.EACCES),
+                    filename,
+                )
+
             with tempfile.NamedTemporaryFile(
                 delete=False,
                 dir=os.path.dirname(filename),
@@ -669,7 +804,7 @@ def _fix_file(
             logger.info(f"Fixed {filename}")
         else:
             encoding = detect_source_encoding(original_source)
-            diff = get_diff_text(
+            diff = iter_diff_text(
                 [
                     line.decode(encoding=encoding)
                     for line in original_source.splitlines(keepends=True)
@@ -680,7 +815,7 @@ def _fix_file(
                 ],
                 filename,
             )
-            stdout.write(diff.encode())
+            stdout.writelines(line.encode() for line in diff)
 
         return 0 if args.exit_zero_even_if_changed else 1
     elif write_to_stdout:
@@ -696,6 +831,15 @@ def _fix_file(
 
 def get_diff_text(old: Sequence[str], new: Sequence[str], filename: str) -> str:
     """Return text of unified diff between old and new."""
+    return "".join(iter_diff_text(old, new, filename))
+
+
+def iter_diff_text(
+    old: Sequence[str],
+    new: Sequence[str],
+    filename: str,
+) -> Iterator[str]:
+    """Yield the text of unified diff between old and new, line by line."""
     newline = "\n"
     diff = difflib.unified_diff(
         old,
@@ -705,15 +849,12 @@ def get_diff_text(old: Sequence[str], new: Sequence[str], filename: str) -> str:
         lineterm=newline,
     )
 
-    text = ""
     for line in diff:
-        text += line
+        yield line
 
         # Work around missing newline (http://bugs.python.org/issue2142).
         if not line.endswith(newline):
-            text += newline + r"\ No newline at end of file" + newline
-
-    return text
+            yield newline + r"\ No newline at end of file" + newline
 
 
 def is_python_file(filename: str) -> bool:
@@ -737,24 +878,47 @@ def is_python_file(filename: str) -> bool:
     return True
 
 
-def is_exclude_file(filename: str, exclude: Iterable[str]) -> bool:
+def compile_exclude(globs: Iterable[str]) -> re.Pattern[str] | None:
+    """
+    Compile exclude globs into a single regular expression.
+
+    Return None if there are no globs, so callers can skip matching entirely.
+    """
+    patterns = [fnmatch.translate(os.path.normcase(glob)) for glob in globs]
+    if not patterns:
+        return None
+
+    return re.compile("|".join(patterns))
+
+
+def is_exclude_file(filename: str, exclude: re.Pattern[str] | None) -> bool:
     """Return True if file matches exclude pattern."""
-    base_name = os.path.basename(filename)
+    return _is_excluded_name(os.path.basename(filename), filename, exclude)
+
 
+def _is_excluded_name(
+    base_name: str,
+    path: str,
+    exclude: re.Pattern[str] | None,
+) -> bool:
+    """Same as is_exclude_file, for callers that already know the basename."""
     if base_name.startswith("."):
         return True
 
-    for pattern in exclude:
-        if fnmatch.fnmatch(base_name, pattern):
-            return True
-
-        if fnmatch.fnmatch(filename, pattern):
-            return True
+    if exclude is None:
+        return False
 
-    return False
+    return bool(
+        exclude.match(os.path.normcase(base_name))
+        or exclude.match(os.path.normcase(path)),
+    )
 
 
-def match_file(filename: str, exclude: Iterable[str], logger: logging.Logger) -> bool:
+def match_file(
+    filename: str,
+    exclude: re.Pattern[str] | None,
+    logger: logging.Logger,
+) -> bool:
     """Return True if file is okay for modifying/recursing."""
     if is_exclude_file(filename, exclude):
         logger.debug("Skipped %s: matched to exclude pattern", filename)
@@ -769,26 +933,103 @@ def match_file(filename: str, exclude: Iterable[str], logger: logging.Logger) ->
 def find_files(
     filenames: list[str],
     recursive: bool,
-    exclude: Iterable[str],
+    exclude: re.Pattern[str] | None,
     logger: logging.Logger,
 ) -> Iterator[str]:
-    """Yield filenames."""
-    while filenames:
-        name = filenames.pop(0)
-        if recursive and os.path.isdir(name):
-            for root, directories, children in os.walk(name):
-                filenames += [
-                    os.path.join(root, f)
-                    for f in children
-                    if match_file(os.path.join(root, f), exclude, logger)
-                ]
-                directories[:] = [
-                    d
-                    for d in directories
-                    if match_file(os.path.join(root, d), exclude, logger)
-                ]
-        else:
-            if not is_exclude_file(name, exclude):
-                yield name
-            else:
+    """Yield filenames.
+
+    Files found in a directory are yielded after the remaining paths, in the
+    order os.walk would find them. Each file is yielded at most once, even
+    when it's reachable from more than one of the given paths.
+    """
+    # The level doesn't change while walking, so check it once rather than on
+    # every skipped entry.
+    debug = logger.isEnabledFor(logging.DEBUG)
+    # Directories are told apart by their real path, which catches the same
+    # directory reached through a symbolic link. Files are told apart by
+    # path: hard links are distinct files to fix. Inode numbers aren't used
+    # for either, since they aren't unique on every filesystem.
+    seen_directories: set[str] = set()
+    seen_files: set[str] = set()
+    queue: collections.deque[str | Iterator[str]] = collections.deque(filenames)
+    while queue:
+        name = queue.popleft()
+        if not isinstance(name, str):
+            yield from name
+        elif recursive and os.path.isdir(name):
+            # The directory is scanned lazily, once the paths ahead of it in
+            # the queue have been yielded.
+            queue.append(
+                _scan_directory(
+                    name,
+                    exclude,
+                    logger,
+                    debug,
+                    seen_directories,
+                    seen_files,
+                ),
+            )
+        elif is_exclude_file(name, exclude):
+            if debug:
                 logger.debug("Skipped %s: matched to exclude pattern", name)
+        elif name == "-" or _first_visit(name, seen_files):
+            yield name
+
+
+def _first_visit(filename: str, seen_files: set[str]) -> bool:
+    """Return True, and record the file as seen, if it hasn't been seen yet."""
+    key = os.path.normcase(os.path.abspath(filename))
+    if key in seen_files:
+        return False
+
+    seen_files.add(key)
+    return True
+
+
+def _scan_directory(
+    directory: str,
+    exclude: re.Pattern[str] | None,
+    logger: logging.Logger,
+    debug: bool,
+    seen_directories: set[str],
+    seen_files: set[str],
+) -> Iterator[str]:
+    """Yield Python files under directory, recursively.
+
+    Like os.walk, yields the files in a directory before descending into its
+    subdirectories. Uses os.scandir so file types come from the directory
+    listing instead of an extra stat call per entry.
+    """
+    key = os.path.normcase(os.path.realpath(directory))
+    if key in seen_directories:
+        return
+    seen_directories.add(key)
+
+    try:
+        with os.scandir(directory) as it:
+            entries = list(it)
+    except OSError:
+        # Same as os.walk: unreadable directories are silently skipped.
+        return
+
+    subdirectories = []
+    for entry in entries:
+        if _is_excluded_name(entry.name, entry.path, exclude):
+            if debug:
+                logger.debug("Skipped %s: matched to exclude pattern", entry.path)
+        elif entry.is_dir():
+            # Like os.walk, don't follow symbolic links to directories.
+            if not entry.is_symlink():
+                subdirectories.append(entry.path)
+        elif is_python_file(entry.path) and _first_visit(entry.path, seen_files):
+            yield entry.path
+
+    for subdirectory in subdirectories:
+        yield from _scan_directory(
+            subdirectory,
+            exclude,
+            logger,
+            debug,
+            seen_directories,
+            seen_files,
+        )
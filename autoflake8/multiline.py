@@ -21,6 +21,7 @@ class FilterMultilineImport(PendingFix):
     """
 
     BASE_RE = re.compile(rb"\bfrom\s+([^ ]+)")
+    GIVE_UP_RE = re.compile(rb"[;:#]")
     IDENTIFIER_RE = re.compile(rb"[^,\s]+")
     IMPORT_RE = re.compile(rb"\bimport\b\s*")
     INDENTATION_RE = re.compile(rb"^\s*")
@@ -59,7 +60,7 @@ class FilterMultilineImport(PendingFix):
 
     def analyze(self, line: bytes) -> None:
         """Decide if the statement will be fixed or left unchanged."""
-        if any(ch in line for ch in b";:#"):
+        if self.GIVE_UP_RE.search(line):
             self.give_up = True
 
     def fix(self, accumulated: Iterable[bytes]) -> bytes:
@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import collections
-
 
 class PendingFix:
     """Allows a rewrite operation to span multiple lines.
@@ -13,7 +11,7 @@ class PendingFix:
 
     def __init__(self, line: bytes) -> None:
         """Analyse and store the first line."""
-        self.accumulator = collections.deque([line])
+        self.accumulator = [line]
 
     def __call__(self, line: bytes) -> object:
         """Process line considering the accumulator.
@@ -30,8 +28,4 @@ def get_line_ending(line: bytes) -> bytes:
 
     Note: this function should be somewhere else.
     """
-    non_whitespace_index = len(line.rstrip()) - len(line)
-    if not non_whitespace_index:
-        return b""
-    else:
-        return line[non_whitespace_index:]
+    return line[len(line.rstrip()) :]
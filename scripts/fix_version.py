@@ -2,14 +2,19 @@
 from __future__ import annotations
 
 import pathlib
+import re
 import sys
 
+PACKAGE_VERSION_RE = re.compile(r"^__version__ = (.+)$", re.M)
+POETRY_VERSION_RE = re.compile(r"^version = (.+)$", re.M)
+
 
 def main() -> int:
     init_file = "autoflake8/__init__.py"
+    init_text = pathlib.Path(init_file).read_text()
 
     poetry_version = get_poetry_version()
-    package_version_info = get_package_version(init_file)
+    package_version_info = get_package_version(init_text)
 
     if not poetry_version or not package_version_info:
         print_err(
@@ -19,14 +24,20 @@ def main() -> int:
 
     status_code = 0
 
-    package_version, lineno = package_version_info
+    package_version, start, end = package_version_info
     if poetry_version != package_version:
         print_err(
             f"ERROR: version mismatch.\n"
             f"version in __init__.py: {package_version}\n"
             f"version in pyproject.toml: {poetry_version}",
         )
-        rewrite_file_line(init_file, lineno, f'__version__ = "{poetry_version}"')
+        rewrite_file_span(
+            init_file,
+            init_text,
+            start,
+            end,
+            f'__version__ = "{poetry_version}"',
+        )
         print_err(f"fixed {init_file}")
 
         status_code |= 1
@@ -38,35 +49,36 @@ def print_err(v: str) -> None:
     print(v, file=sys.stderr)
 
 
-def get_package_version(filepath: str) -> tuple[str, int] | None:
-    with open(filepath) as f:
-        for lineno, line in enumerate(f, start=1):
-            if line.startswith("__version__ = "):
-                return _get_version(line), lineno
+def get_package_version(text: str) -> tuple[str, int, int] | None:
+    """Return the version and the start and end offsets of its line."""
+    m = PACKAGE_VERSION_RE.search(text)
+    if not m:
+        return None
 
-    return None
+    return _get_version(m.group(1)), m.start(), m.end()
 
 
 def get_poetry_version() -> str | None:
-    with open("pyproject.toml") as f:
-        for line in f:
-            if line.startswith("version = "):
-                return _get_version(line)
+    m = POETRY_VERSION_RE.search(pathlib.Path("pyproject.toml").read_text())
+    if not m:
+        return None
 
-    return None
+    return _get_version(m.group(1))
 
 
-def rewrite_file_line(filepath: str, lineno: int, content_overwrite: str) -> None:
-    # this is done the stupid way because I never expect __init__.py to grow too much :)
-    f = pathlib.Path(filepath)
-    original_lines = f.read_text().splitlines(keepends=True)
-    original_lines[lineno - 1] = f"{content_overwrite}\n"
-    f.write_text("".join(original_lines))
+def rewrite_file_span(
+    filepath: str,
+    text: str,
+    start: int,
+    end: int,
+    content_overwrite: str,
+) -> None:
+    """Write text to filepath, with text[start:end] replaced."""
+    pathlib.Path(filepath).write_text(text[:start] + content_overwrite + text[end:])
 
 
-def _get_version(line: str) -> str:
-    _, _, version = line.partition(" = ")
-    return version.strip().strip('"')
+def _get_version(value: str) -> str:
+    return value.strip().strip('"')
 
 
 if __name__ == "__main__":
@@ -8,6 +8,8 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import concurrent.futures
+import contextlib
 import difflib
 import os
 import pathlib
@@ -19,14 +21,17 @@ import tempfile
 from typing import IO
 from typing import Sequence
 
-import aiofiles
-
 from autoflake8.fix import check as autoflake8_check
 from autoflake8.fix import detect_source_encoding
+from autoflake8.fix import fix_code
 
 
-ROOT_PATH = pathlib.Path(__file__).parent.parent.absolute()
-AUTOFLAKE8_BIN = f"'{sys.executable}' '{ROOT_PATH / 'autoflake8' / 'cli.py'}'"
+# fix_code() keyword arguments for each autoflake8 option.
+FIX_CODE_OPTIONS = {
+    "--expand-star-imports": "expand_star_imports",
+    "--remove-duplicate-keys": "remove_duplicate_keys",
+    "--remove-unused-variables": "remove_unused_variables",
+}
 
 if sys.stdout.isatty():
     YELLOW = "\x1b[33m"
@@ -46,12 +51,27 @@ class Worker:
         queue: asyncio.Queue[str],
         args: argparse.Namespace,
         options: Sequence[str],
+        pool: concurrent.futures.Executor,
     ) -> None:
         self.queue = queue
         self.args = args
         self.options = options
+        self.pool = pool
 
     async def run(self) -> None:
+        # With --command, files are fixed in copies on disk. Each worker
+        # reuses a single temporary directory for all of its batches.
+        temp_directory: str | None = None
+        try:
+            if self.args.command is not None:
+                temp_directory = await asyncio.to_thread(tempfile.mkdtemp)
+
+            await self._run(temp_directory)
+        finally:
+            if temp_directory is not None:
+                await asyncio.to_thread(shutil.rmtree, temp_directory)
+
+    async def _run(self, temp_directory: str | None) -> None:
         self.running = True
         while self.running:
             try:
@@ -59,17 +79,29 @@ class Worker:
             except asyncio.TimeoutError:
                 continue
             else:
+                # Fix several files per batch, so that with --command the
+                # interpreter startup is paid once per batch.
+                filenames = [filename]
+                while len(filenames) < self.args.batch_size:
+                    try:
+                        filenames.append(self.queue.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+
                 try:
-                    print(
-                        colored(f"--->  Testing with {filename}", YELLOW),
-                        file=sys.stderr,
-                    )
+                    for filename in filenames:
+                        print(
+                            colored(f"--->  Testing with {filename}", YELLOW),
+                            file=sys.stderr,
+                        )
 
                     await run(
-                        filename=filename,
+                        filenames=filenames,
                         command=self.args.command,
                         verbose=self.args.verbose,
                         options=self.options,
+                        pool=self.pool,
+                        temp_directory=temp_directory,
                     )
                 except Autoflake8Error as e:
                     print(f"fuzz error: {e}", file=sys.stderr)
@@ -77,7 +109,8 @@ class Worker:
                         print(f"caused by: {e.__cause__}", file=sys.stderr)
                     raise
                 finally:
-                    self.queue.task_done()
+                    for _ in filenames:
+                        self.queue.task_done()
 
     def stop(self) -> None:
         self.running = False
@@ -88,75 +121,147 @@ def colored(text, color):
     return color + text + END
 
 
-async def pyflakes_count(filename: str) -> int:
+async def pyflakes_count(
+    source: bytes,
+    pool: concurrent.futures.Executor | None = None,
+) -> int:
     """Return pyflakes error count."""
-    async with aiofiles.open(filename, "rb") as f:
-        return len(list(autoflake8_check(await f.read())))
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool, _pyflakes_count, source)
 
 
-async def readlines(filename: str) -> Sequence[str]:
-    """Return contents of file as a list of lines."""
-    async with aiofiles.open(filename, "rb") as f:
-        source = await f.read()
+def _pyflakes_count(source: bytes) -> int:
+    return len(autoflake8_check(source))
 
-        return source.decode(
-            encoding=detect_source_encoding(source),
-        ).splitlines(keepends=True)
 
+def readlines(source: bytes, encoding: str) -> Sequence[str]:
+    """Return source decoded as a list of lines."""
+    return source.decode(encoding=encoding).splitlines(keepends=True)
 
-async def diff(before: str, after: str) -> str:
-    """Return diff of two files."""
+
+def diff(before: bytes, after: bytes, filename: str) -> str:
+    """Return diff of two versions of a file."""
+    # autoflake8 doesn't touch the encoding declaration, so both versions
+    # share it.
+    encoding = detect_source_encoding(before)
 
     return "".join(
         difflib.unified_diff(
-            await readlines(before),
-            await readlines(after),
-            before,
-            after,
+            readlines(before, encoding),
+            readlines(after, encoding),
+            filename,
+            f"{filename} (fixed)",
         ),
     )
 
 
 async def run(
-    filename: str,
-    command: str,
+    filenames: Sequence[str],
+    command: Sequence[str] | None,
     verbose: bool = False,
-    options: Sequence[str] | None = None,
+    options: Sequence[str] = (),
+    pool: concurrent.futures.Executor | None = None,
+    temp_directory: str | None = None,
 ) -> None:
     """
-    Run autoflake on file at filename.
+    Run autoflake on the files at filenames.
 
-    Return True on success.
+    CPU-bound work is done in pool, so that it runs in parallel with other
+    workers. command, if given, fixes copies of the files made in
+    temp_directory.
     """
-    if not options:
-        options = []
+    if command is not None:
+        assert temp_directory is not None, "command needs a temporary directory"
+        await _run_command(
+            filenames,
+            command,
+            temp_directory,
+            verbose,
+            options,
+            pool,
+        )
+        return
+
+    # In-process fixes work on the file contents in memory, with no copies
+    # on disk.
+    loop = asyncio.get_running_loop()
+    for filename in filenames:
+        try:
+            source = pathlib.Path(filename).read_bytes()
+        except OSError as exc:
+            raise Autoflake8Error("something went wrong") from exc
+
+        try:
+            fixed_source = await loop.run_in_executor(
+                pool,
+                _fix_source,
+                source,
+                options,
+            )
+        except Exception as exc:
+            raise Autoflake8Error(f"autoflake crashed on {filename}") from exc
+
+        await _check_fixed_source(filename, source, fixed_source, verbose, pool)
+
+
+def _fix_source(source: bytes, options: Sequence[str]) -> bytes:
+    return fix_code(
+        source,
+        **{FIX_CODE_OPTIONS[option]: True for option in options},
+    )
 
-    temp_directory: str | None = None
+
+async def _run_command(
+    filenames: Sequence[str],
+    command: Sequence[str],
+    temp_directory: str,
+    verbose: bool,
+    options: Sequence[str],
+    pool: concurrent.futures.Executor | None,
+) -> None:
+    # Each file gets its own directory, as files in a batch may share a name.
+    # The directories are kept around for the next batch.
+    temp_filenames = [
+        os.path.join(temp_directory, str(i), os.path.basename(filename))
+        for i, filename in enumerate(filenames)
+    ]
     try:
-        temp_directory = await asyncio.to_thread(tempfile.mkdtemp)
-        await _run(filename, command, temp_directory, verbose, options)
+        for filename, temp_filename in zip(filenames, temp_filenames):
+            await asyncio.to_thread(
+                os.makedirs,
+                os.path.dirname(temp_filename),
+                exist_ok=True,
+            )
+            await asyncio.to_thread(shutil.copyfile, filename, temp_filename)
+
+        await _run_command_on_copies(
+            filenames,
+            temp_filenames,
+            command,
+            verbose,
+            options,
+            pool,
+        )
     finally:
-        if temp_directory is not None:
-            await asyncio.to_thread(shutil.rmtree, temp_directory)
+        for temp_filename in temp_filenames:
+            with contextlib.suppress(FileNotFoundError):
+                await asyncio.to_thread(os.unlink, temp_filename)
 
 
-async def _run(
-    filename: str,
-    command: str,
-    temp_directory: str,
+async def _run_command_on_copies(
+    filenames: Sequence[str],
+    temp_filenames: Sequence[str],
+    command: Sequence[str],
     verbose: bool,
-    options: list[str],
+    options: Sequence[str],
+    pool: concurrent.futures.Executor | None,
 ) -> None:
-    temp_filename = os.path.join(temp_directory, os.path.basename(filename))
-
-    await asyncio.to_thread(shutil.copyfile, filename, temp_filename)
 
-    cmd = shlex.split(command)
     proc = await asyncio.subprocess.create_subprocess_exec(
-        cmd[0],
-        *cmd[1:],
+        command[0],
+        *command[1:],
         "--in-place",
-        temp_filename,
+        *temp_filenames,
         *options,
     )
 
@@ -165,40 +270,62 @@ async def _run(
     # status 1 is used for when the file needs to be fixed, anything bigger
     # than 1 is some issue.
     if status > 1:
-        raise Autoflake8Error(f"autoflake crashed on {filename}")
+        raise Autoflake8Error(f"autoflake crashed on one of {', '.join(filenames)}")
 
-    try:
-        file_diff = await diff(filename, temp_filename)
-        if verbose:
-            print(file_diff, file=sys.stderr)
+    for filename, temp_filename in zip(filenames, temp_filenames):
+        try:
+            source = pathlib.Path(filename).read_bytes()
+            fixed_source = pathlib.Path(temp_filename).read_bytes()
+        except OSError as exc:
+            raise Autoflake8Error("something went wrong") from exc
 
-        if await check_syntax(filename):
-            try:
-                await check_syntax(temp_filename, raise_error=True)
-            except (
-                SyntaxError,
-                TypeError,
-                ValueError,
-            ) as exc:
-                raise Autoflake8Error(f"autoflake broke {filename}") from exc
+        await _check_fixed_source(filename, source, fixed_source, verbose, pool)
 
-        before_count = await pyflakes_count(filename)
-        after_count = await pyflakes_count(temp_filename)
 
-        if verbose:
-            print("(before, after):", (before_count, after_count))
-
-        if file_diff and after_count > before_count:
-            raise Autoflake8Error(f"autoflake made {filename} worse")
-    except OSError as exc:
-        raise Autoflake8Error("something went wrong") from exc
-
-
-async def check_syntax(filename: str, raise_error: bool = False) -> bool:
+async def _check_fixed_source(
+    filename: str,
+    source: bytes,
+    fixed_source: bytes,
+    verbose: bool,
+    pool: concurrent.futures.Executor | None,
+) -> None:
+    if verbose:
+        print(diff(source, fixed_source, filename), file=sys.stderr)
+
+    if fixed_source == source:
+        # The file was left untouched, so autoflake8 can't have broken it
+        # or made it worse.
+        return
+
+    if await check_syntax(source, pool):
+        try:
+            await check_syntax(fixed_source, pool, raise_error=True)
+        except (
+            SyntaxError,
+            TypeError,
+            ValueError,
+        ) as exc:
+            raise Autoflake8Error(f"autoflake broke {filename}") from exc
+
+    before_count = await pyflakes_count(source, pool)
+    after_count = await pyflakes_count(fixed_source, pool)
+
+    if verbose:
+        print("(before, after):", (before_count, after_count))
+
+    if after_count > before_count:
+        raise Autoflake8Error(f"autoflake made {filename} worse")
+
+
+async def check_syntax(
+    source: bytes,
+    pool: concurrent.futures.Executor | None = None,
+    raise_error: bool = False,
+) -> bool:
     """Return True if syntax is okay."""
+    loop = asyncio.get_running_loop()
     try:
-        source = "".join(await readlines(filename))
-        compile(source, "<string>", "exec", dont_inherit=True)
+        await loop.run_in_executor(pool, _compile_source, source)
         return True
     except (SyntaxError, TypeError, ValueError):
         if raise_error:
@@ -207,6 +334,12 @@ async def check_syntax(filename: str, raise_error: bool = False) -> bool:
             return False
 
 
+def _compile_source(source: bytes) -> None:
+    # compile() decodes bytes following PEP 263 itself, so the source only
+    # needs decoding here when a diff is printed.
+    compile(source, "<string>", "exec", dont_inherit=True)
+
+
 def process_args() -> argparse.Namespace:
     """Return processed arguments (options and positional arguments)."""
 
@@ -214,8 +347,9 @@ def process_args() -> argparse.Namespace:
 
     parser.add_argument(
         "--command",
-        default=AUTOFLAKE8_BIN,
-        help="autoflake command (default: %(default)s)",
+        type=shlex.split,
+        help="autoflake command to run on each batch of files, instead of "
+        "fixing them in-process",
     )
 
     parser.add_argument(
@@ -252,6 +386,15 @@ def process_args() -> argparse.Namespace:
         default=1,
     )
 
+    parser.add_argument(
+        "-b",
+        "--batch-size",
+        type=int,
+        dest="batch_size",
+        default=16,
+        help="max number of files per autoflake run (default: %(default)d)",
+    )
+
     parser.add_argument(
         "-m",
         "--max-files",
@@ -282,34 +425,38 @@ async def check(args: argparse.Namespace, stdin: IO[str]) -> bool:
 
     queue: asyncio.Queue[str] = asyncio.Queue()
 
-    workers = [
-        Worker(
-            queue=queue,
-            args=args,
-            options=options,
-        )
-        for _ in range(args.num_workers)
-    ]
-    worker_tasks = [asyncio.create_task(worker.run()) for worker in workers]
-
-    files_to_skip = {"bad_coding.py", "badsyntax_pep3120.py"}
-
-    all_files = [line.strip() for line in stdin.readlines()]
-    random.shuffle(all_files)
-    for filename in all_files[: args.max_files]:
-        basename = os.path.basename(filename)
-        if not os.path.exists(filename):
-            # Invalid symlink.
-            continue
+    # Fixing, compiling and running pyflakes all hold the GIL, so they run in
+    # a process pool to spread across cores.
+    with concurrent.futures.ProcessPoolExecutor() as pool:
+        workers = [
+            Worker(
+                queue=queue,
+                args=args,
+                options=tuple(options),
+                pool=pool,
+            )
+            for _ in range(args.num_workers)
+        ]
+        worker_tasks = [asyncio.create_task(worker.run()) for worker in workers]
+
+        files_to_skip = {"bad_coding.py", "badsyntax_pep3120.py"}
+
+        all_files = [line.strip() for line in stdin.readlines()]
+        random.shuffle(all_files)
+        for filename in all_files[: args.max_files]:
+            basename = os.path.basename(filename)
+            if not os.path.exists(filename):
+                # Invalid symlink.
+                continue
 
-        if basename not in files_to_skip:
-            queue.put_nowait(filename)
+            if basename not in files_to_skip:
+                queue.put_nowait(filename)
 
-    await queue.join()
-    for w in workers:
-        w.stop()
+        await queue.join()
+        for w in workers:
+            w.stop()
 
-    await asyncio.gather(*worker_tasks)
+        await asyncio.gather(*worker_tasks)
 
     return True
 
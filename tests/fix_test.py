@@ -9,11 +9,15 @@ import subprocess
 from contextlib import _GeneratorContextManager
 from typing import Callable
 from typing import Iterable
+from unittest import mock
 
+import pyflakes.checker
 import pytest
 
 from autoflake8.fix import break_up_import
 from autoflake8.fix import check
+from autoflake8.fix import classify_messages
+from autoflake8.fix import compile_exclude
 from autoflake8.fix import detect_source_encoding
 from autoflake8.fix import filter_code
 from autoflake8.fix import filter_from_import
@@ -105,6 +109,27 @@ def test_unused_import_line_numbers_with_dot() -> None:
     ) == [1]
 
 
+def test_classify_messages() -> None:
+    messages = classify_messages(
+        check(
+            b"""\
+import os, sys
+from math import *
+def foo():
+    x = 1
+    return {"a": 1, "a": 2, "b": pi}
+""",
+        ),
+    )
+
+    assert messages.unused_import_line_numbers == {1}
+    assert messages.unused_module_names == {1: [b"os", b"sys"]}
+    assert messages.star_import_used_line_numbers == {2}
+    assert messages.star_import_undefined_names == [b"pi"]
+    assert messages.unused_variable_line_numbers == {4}
+    assert [m.lineno for m in messages.duplicate_key_messages] == [5, 5]
+
+
 @pytest.mark.parametrize(
     ("source", "expected"),
     [
@@ -121,12 +146,10 @@ def test_get_indentation(source: bytes, expected: bytes) -> None:
 
 
 def test_filter_star_import() -> None:
-    assert (
-        filter_star_import(b"from math import *", [b"cos"]) == b"from math import cos"
-    )
+    assert filter_star_import(b"from math import *", b"cos") == b"from math import cos"
 
     assert (
-        filter_star_import(b"from math import *", [b"sin", b"cos"])
+        filter_star_import(b"from math import *", b"cos, sin")
         == b"from math import cos, sin"
     )
 
@@ -191,6 +214,27 @@ os.foo()
     assert result == expected
 
 
+def test_filter_code_without_changes_yields_source_once() -> None:
+    source = b"""\
+import os
+os.foo()
+"""
+
+    assert list(filter_code(source)) == [source]
+
+
+def test_filter_code_without_imports_skips_pyflakes() -> None:
+    source = b"""\
+def foo():
+    x = 1
+"""
+
+    with mock.patch("autoflake8.fix.check") as check_mock:
+        assert list(filter_code(source)) == [source]
+
+    check_mock.assert_not_called()
+
+
 def test_filter_code_with_indented_import() -> None:
     result = b"".join(
         filter_code(
@@ -506,6 +550,8 @@ def test_is_multiline_import(line: bytes, previous_line: bytes, expected: bool)
         pytest.param(b"x = 1;", b"", True, id="assignment with semicolon"),
         pytest.param(b"import os; \\", b"", True, id="continuation (backslash)"),
         pytest.param(b"foo(", b"", True, id="unclosed parens"),
+        pytest.param(b"})", b"", True, id="unmatched closing brackets"),
+        pytest.param(b"x = foo()  # (", b"", False, id="bracket in comment"),
         pytest.param(b"1", b"x = \\", True, id="simple value, with previous_line"),
     ],
 )
@@ -693,6 +739,22 @@ x = version
     assert result == expected
 
 
+def test_fix_code_with_clean_source_runs_filters_once() -> None:
+    source = b"import os\nos.getcwd()\n"
+
+    with mock.patch(
+        "autoflake8.fix.filter_code",
+        wraps=filter_code,
+    ) as filter_code_mock, mock.patch(
+        "autoflake8.fix.filter_useless_pass",
+        wraps=filter_useless_pass,
+    ) as filter_useless_pass_mock:
+        assert fix_code(source) == source
+
+    filter_code_mock.assert_called_once()
+    filter_useless_pass_mock.assert_called_once()
+
+
 def test_fix_code_with_from_and_as__mixed() -> None:
     result = fix_code(
         b"""\
@@ -1186,6 +1248,10 @@ def test_useless_pass_line_numbers() -> None:
     assert list(useless_pass_line_numbers(b"if True:\n    pass\n")) == []
 
 
+def test_useless_pass_line_numbers_without_pass_skips_tokenize() -> None:
+    assert list(useless_pass_line_numbers(b"foo(\n")) == []
+
+
 def test_useless_pass_line_numbers_with_escaped_newline() -> None:
     assert list(useless_pass_line_numbers(b"if True:\\\n    pass\n")) == []
 
@@ -1263,6 +1329,15 @@ else:
     assert result == expected
 
 
+def test_filter_useless_pass_without_changes_yields_source_once() -> None:
+    source = b"""\
+if True:
+    pass
+"""
+
+    assert list(filter_useless_pass(source)) == [source]
+
+
 def test_filter_useless_pass_with_syntax_error() -> None:
     source = b"""\
 if True:
@@ -1476,6 +1551,20 @@ def test_check_with_unicode() -> None:
     assert check("import os  # ∑".encode())
 
 
+@pytest.mark.skipif(
+    not hasattr(pyflakes.checker, "make_tokens"),
+    reason="pyflakes >= 3.0 doesn't check type comments",
+)
+def test_fix_code_keeps_imports_used_in_type_comments() -> None:
+    source = b"""\
+from typing import List
+
+x = []  # type: List[int]
+"""
+
+    assert fix_code(source) == source
+
+
 def test_get_diff_text() -> None:
     result = "\n".join(
         get_diff_text(["foo\n"], ["bar\n"], "").split("\n")[3:],
@@ -1543,10 +1632,12 @@ def test_is_python_file(
         ("test/test.py", ["test/**.py"], True),
         ("test/auto_test.py", ["test/*_test.py"], True),
         ("test/auto_auto.py", ["test/*_test.py"], False),
+        ("1.py", [], False),
+        (".1.py", [], True),
     ],
 )
 def test_is_exclude_file(filename: str, exclude: Iterable[str], expected: bool) -> None:
-    assert is_exclude_file(filename, exclude) is expected
+    assert is_exclude_file(filename, compile_exclude(exclude)) is expected
 
 
 def test_match_file(
@@ -1554,12 +1645,12 @@ def test_match_file(
     logger: logging.Logger,
 ) -> None:
     with temporary_file("", suffix=".py", prefix=".") as filename:
-        assert match_file(filename, exclude=[], logger=logger) is False
+        assert match_file(filename, exclude=None, logger=logger) is False
 
-    assert match_file(os.devnull, exclude=[], logger=logger) is False
+    assert match_file(os.devnull, exclude=None, logger=logger) is False
 
     with temporary_file("", suffix=".py", prefix="") as filename:
-        assert match_file(filename, exclude=[], logger=logger) is True
+        assert match_file(filename, exclude=None, logger=logger) is True
 
 
 def test_find_files(tmp_path: pathlib.Path, logger: logging.Logger) -> None:
@@ -1577,7 +1668,12 @@ def test_find_files(tmp_path: pathlib.Path, logger: logging.Logger) -> None:
     (sub / "c.py").write_text("")
 
     files = list(
-        find_files([str(tmp_path / "dir")], True, [str(exclude)], logger=logger),
+        find_files(
+            [str(tmp_path / "dir")],
+            True,
+            compile_exclude([str(exclude)]),
+            logger=logger,
+        ),
     )
 
     file_names = [os.path.basename(f) for f in files]
@@ -1586,6 +1682,101 @@ def test_find_files(tmp_path: pathlib.Path, logger: logging.Logger) -> None:
     assert "c.py" not in file_names
 
 
+def test_find_files_with_overlapping_paths(
+    tmp_path: pathlib.Path,
+    logger: logging.Logger,
+) -> None:
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    (tmp_path / "a.py").write_text("")
+    (sub / "b.py").write_text("")
+
+    files = list(
+        find_files(
+            [str(tmp_path), str(sub), str(tmp_path / "a.py")],
+            True,
+            None,
+            logger=logger,
+        ),
+    )
+
+    assert sorted(os.path.basename(f) for f in files) == ["a.py", "b.py"]
+
+
+def test_find_files_order(tmp_path: pathlib.Path, logger: logging.Logger) -> None:
+    (tmp_path / "d" / "sub").mkdir(parents=True)
+    (tmp_path / "d" / "sub" / "b.py").write_text("")
+    (tmp_path / "d" / "a.py").write_text("")
+    (tmp_path / "c.py").write_text("")
+
+    files = find_files(
+        [str(tmp_path / "d"), str(tmp_path / "c.py")],
+        True,
+        None,
+        logger=logger,
+    )
+
+    assert [os.path.relpath(f, tmp_path) for f in files] == [
+        "c.py",
+        os.path.join("d", "a.py"),
+        os.path.join("d", "sub", "b.py"),
+    ]
+
+
+@pytest.mark.skipif(not hasattr(os, "link"), reason="requires hard links")
+def test_find_files_with_hard_links(
+    tmp_path: pathlib.Path,
+    logger: logging.Logger,
+) -> None:
+    (tmp_path / "a.py").write_text("")
+    os.link(tmp_path / "a.py", tmp_path / "b.py")
+
+    files = list(find_files([str(tmp_path)], True, None, logger=logger))
+
+    assert sorted(os.path.basename(f) for f in files) == ["a.py", "b.py"]
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="requires symlinks")
+def test_find_files_does_not_follow_directory_symlinks(
+    tmp_path: pathlib.Path,
+    logger: logging.Logger,
+) -> None:
+    target = tmp_path / "dir"
+    target.mkdir()
+    (target / "a.py").write_text("")
+
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "b.py").write_text("")
+    (target / "link").symlink_to(outside, target_is_directory=True)
+
+    files = list(find_files([str(target)], True, None, logger=logger))
+
+    assert [os.path.basename(f) for f in files] == ["a.py"]
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="requires symlinks")
+def test_find_files_with_paths_overlapping_through_symlink(
+    tmp_path: pathlib.Path,
+    logger: logging.Logger,
+) -> None:
+    real = tmp_path / "real"
+    (real / "sub").mkdir(parents=True)
+    (real / "a.py").write_text("")
+    (real / "sub" / "b.py").write_text("")
+    link = tmp_path / "link"
+    link.symlink_to(real, target_is_directory=True)
+
+    files = list(
+        find_files([str(link), str(real / "sub")], True, None, logger=logger),
+    )
+
+    assert [os.path.relpath(f, tmp_path) for f in files] == [
+        os.path.join("link", "a.py"),
+        os.path.join("link", "sub", "b.py"),
+    ]
+
+
 def test_exclude(
     autoflake8_command: list[str],
     temporary_directory: Callable[..., _GeneratorContextManager[str]],
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import io
 import logging
+import os
+import pathlib
 import subprocess
 from contextlib import _GeneratorContextManager
 from typing import Callable
@@ -10,6 +12,7 @@ from unittest import mock
 
 import pytest
 
+from autoflake8 import cli
 from autoflake8.cli import _main
 
 
@@ -210,6 +213,204 @@ except ImportError:
         )
 
 
+def test_check_with_jobs(
+    temporary_file: Callable[..., _GeneratorContextManager[str]],
+    devnull: IO[bytes],
+    logger: logging.Logger,
+) -> None:
+    with temporary_file("import os\n") as dirty, temporary_file(
+        "import os\nos.getcwd()\n",
+    ) as clean:
+        output_file = io.BytesIO()
+
+        with mock.patch.object(
+            cli,
+            "_fix_files_in_parallel",
+            wraps=cli._fix_files_in_parallel,
+        ) as fix_files_in_parallel:
+            status = _main(
+                argv=["my_fake_program", "--check", "--jobs", "2", dirty, clean],
+                stdout=output_file,
+                logger=logger,
+                stdin=devnull,
+            )
+
+        fix_files_in_parallel.assert_called_once()
+        assert status == 1
+        assert (
+            output_file.getvalue()
+            == f"{dirty}: Unused imports/variables detected\n".encode()
+        )
+
+
+def test_check_with_default_jobs_and_few_files(
+    temporary_file: Callable[..., _GeneratorContextManager[str]],
+    devnull: IO[bytes],
+    logger: logging.Logger,
+) -> None:
+    with temporary_file("import os\n") as dirty, temporary_file(
+        "import os\nos.getcwd()\n",
+    ) as clean:
+        output_file = io.BytesIO()
+
+        with mock.patch("os.cpu_count", return_value=4), mock.patch.object(
+            cli,
+            "_fix_files_in_parallel",
+        ) as fix_files_in_parallel:
+            status = _main(
+                argv=["my_fake_program", "--check", dirty, clean],
+                stdout=output_file,
+                logger=logger,
+                stdin=devnull,
+            )
+
+        fix_files_in_parallel.assert_not_called()
+        assert status == 1
+        assert (
+            output_file.getvalue()
+            == f"{dirty}: Unused imports/variables detected\n".encode()
+        )
+
+
+def test_check_with_default_jobs_and_many_files(
+    tmp_path: pathlib.Path,
+    devnull: IO[bytes],
+    logger: logging.Logger,
+) -> None:
+    filenames = []
+    for i in range(cli._DEFAULT_JOBS_MIN_FILES):
+        path = tmp_path / f"f{i:02}.py"
+        path.write_text("import os\n")
+        filenames.append(str(path))
+
+    output_file = io.BytesIO()
+
+    with mock.patch("os.cpu_count", return_value=2), mock.patch.object(
+        cli,
+        "_fix_files_in_parallel",
+        wraps=cli._fix_files_in_parallel,
+    ) as fix_files_in_parallel:
+        status = _main(
+            argv=["my_fake_program", "--check", *filenames],
+            stdout=output_file,
+            logger=logger,
+            stdin=devnull,
+        )
+
+    fix_files_in_parallel.assert_called_once()
+    assert status == 1
+    assert output_file.getvalue() == b"".join(
+        f"{filename}: Unused imports/variables detected\n".encode()
+        for filename in filenames
+    )
+
+
+def test_check_with_jobs_and_stdin(
+    temporary_file: Callable[..., _GeneratorContextManager[str]],
+    logger: logging.Logger,
+) -> None:
+    with temporary_file("import os\n") as first, temporary_file(
+        "import re\n",
+    ) as second:
+        output_file = io.BytesIO()
+
+        status = _main(
+            argv=["my_fake_program", "--check", "--jobs", "2", first, "-", second],
+            stdout=output_file,
+            logger=logger,
+            stdin=io.BytesIO(b"import sys\n"),
+        )
+
+        assert status == 1
+        assert (
+            output_file.getvalue()
+            == (
+                f"{first}: Unused imports/variables detected\n"
+                "<stdin>: Unused imports/variables detected\n"
+                f"{second}: Unused imports/variables detected\n"
+            ).encode()
+        )
+
+
+def test_check_with_jobs_and_missing_file(
+    temporary_file: Callable[..., _GeneratorContextManager[str]],
+    devnull: IO[bytes],
+) -> None:
+    log_output = io.StringIO()
+    logger = logging.getLogger("test_check_with_jobs_and_missing_file")
+    logger.addHandler(logging.StreamHandler(log_output))
+
+    with temporary_file("import os\nos.getcwd()\n") as clean:
+        status = _main(
+            argv=["my_fake_program", "--check", "--jobs", "2", "nonexistent", clean],
+            stdout=devnull,
+            logger=logger,
+            stdin=devnull,
+        )
+
+    assert status == 3
+    assert "no such file" in log_output.getvalue().lower()
+
+
+def test_in_place_with_jobs_logs_in_order(
+    temporary_file: Callable[..., _GeneratorContextManager[str]],
+    devnull: IO[bytes],
+) -> None:
+    log_output = io.StringIO()
+    logger = logging.getLogger("test_in_place_with_jobs_logs_in_order")
+    logger.addHandler(logging.StreamHandler(log_output))
+
+    with temporary_file("import os\n") as first, temporary_file(
+        "import re\n" * 100,
+    ) as second, temporary_file("import sys\n") as third:
+        _main(
+            argv=[
+                "my_fake_program",
+                "--in-place",
+                "-v",
+                "--jobs",
+                "3",
+                first,
+                second,
+                third,
+            ],
+            stdout=devnull,
+            logger=logger,
+            stdin=devnull,
+        )
+
+    assert log_output.getvalue() == f"Fixed {first}\nFixed {second}\nFixed {third}\n"
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "geteuid") or os.geteuid() == 0,
+    reason="root can write to read-only files",
+)
+def test_in_place_with_read_only_file(
+    temporary_file: Callable[..., _GeneratorContextManager[str]],
+    devnull: IO[bytes],
+) -> None:
+    log_output = io.StringIO()
+    logger = logging.getLogger("test_in_place_with_read_only_file")
+    logger.addHandler(logging.StreamHandler(log_output))
+
+    with temporary_file("import os\n") as filename:
+        os.chmod(filename, 0o444)
+
+        status = _main(
+            argv=["my_fake_program", "--in-place", filename],
+            stdout=devnull,
+            logger=logger,
+            stdin=devnull,
+        )
+
+        with open(filename) as f:
+            assert f.read() == "import os\n"
+
+    assert status == 3
+    assert "permission denied" in log_output.getvalue().lower()
+
+
 def test_in_place_with_empty_file(
     temporary_file: Callable[..., _GeneratorContextManager[str]],
     devnull: IO[bytes],